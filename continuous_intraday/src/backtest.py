@@ -0,0 +1,549 @@
+import bisect
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from bess_intraday_problem import BESSIntraday
+
+
+class BESSIntradayBacktest(BESSIntraday):
+    """
+    BESSIntraday variant used for a single rolling step of a backtest.
+
+    Results are kept in memory and picked up by the backtest engine, so the
+    per-step solve neither overwrites ``timeseries_export.csv`` nor prints
+    the end-of-run messages of the demo.
+    """
+
+    def write(self):
+        """Skip the CSV export; the engine stores the results itself."""
+        pass
+
+    def post(self):
+        """Post-processing without the demo's console output."""
+        super(BESSIntraday, self).post()
+
+
+class ColumnStore:
+    """
+    Compact append-only columnar store.
+
+    Every column is a raw float64 file inside ``path``, and ``schema.json``
+    lists the column names. Appending a row only appends 8 bytes to each
+    column file, so earlier results are never rewritten. A row that was only
+    partially written (e.g. after a crash) is dropped on open.
+
+    Use :meth:`read` (or ``np.fromfile`` on a single column) to load the
+    results.
+    """
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = list(columns)
+        os.makedirs(path, exist_ok=True)
+
+        schema_file = os.path.join(path, 'schema.json')
+        if os.path.exists(schema_file):
+            with open(schema_file) as f:
+                schema = json.load(f)
+            if schema['columns'] != self.columns:
+                raise ValueError(f"Column store {path} was created with different columns.")
+        else:
+            with open(schema_file, 'w') as f:
+                json.dump({'columns': self.columns, 'dtype': 'float64'}, f, indent=2)
+
+        # Drop a torn trailing row, if any
+        self.truncate(len(self))
+
+    def _column_file(self, column):
+        return os.path.join(self.path, f'{column}.f64')
+
+    def __len__(self):
+        sizes = []
+        for column in self.columns:
+            column_file = self._column_file(column)
+            sizes.append(os.path.getsize(column_file) if os.path.exists(column_file) else 0)
+        return min(sizes) // 8
+
+    def append(self, row):
+        """Append one row; missing columns are stored as NaN."""
+        for column in self.columns:
+            with open(self._column_file(column), 'ab') as f:
+                f.write(np.float64(row.get(column, np.nan)).tobytes())
+
+    def truncate(self, n_rows):
+        """Drop all rows after the first ``n_rows``."""
+        for column in self.columns:
+            with open(self._column_file(column), 'ab') as f:
+                f.truncate(n_rows * 8)
+
+    def read(self):
+        """Read all complete rows into a DataFrame."""
+        n_rows = len(self)
+        return pd.DataFrame({
+            column: np.fromfile(self._column_file(column), dtype=np.float64, count=n_rows)
+            for column in self.columns
+        })
+
+
+# Round-off (MWh) below which a SoC deviation from the plan is ignored
+SOC_EPSILON = 1e-6
+
+
+class ChangeDetector:
+    """
+    Decide whether a rolling step can reuse the plan of the last solve.
+
+    The orderbook snapshot of a step is the window the optimization sees:
+    the delivery rows of the remaining horizon in the current orderbook
+    snapshot of the history (see :class:`BacktestEngine`), with the volumes
+    filled in earlier steps taken off. The snapshot of the last solve is
+    recorded after its own fills. Two snapshots are compared row by row for
+    the same delivery rows. A step is skipped when, compared to the last
+    solve,
+
+        * the best bid and ask of the first tradable delivery row moved by
+          at most ``price_tolerance`` ($/MWh),
+        * no price in the remaining horizon changed by more than
+          ``price_tolerance`` and no volume by more than ``volume_tolerance``
+          (relative to the old volume, or to 1 MW for thinner levels),
+        * the state of charge deviates at most ``soc_tolerance`` (MWh) from
+          the planned state of charge, and
+        * the remaining horizon ends where the last solved horizon ended.
+
+    The remaining part of the last plan is then reused: its trades are
+    already committed, so the step makes no new trades. With all tolerances
+    at zero the reused plan is the optimal plan of the remaining horizon;
+    positive tolerances trade optimality for fewer solves.
+
+    With a static history without ``snapshot_time``, as in the demo input,
+    every step sees the same book, so the orderbook checks always pass. Within the engine the state of charge
+    follows the reused plan, so the SoC check only fails when the state is
+    changed from outside the engine. With a fixed ``horizon`` the horizon
+    end moves one row every step, so steps are only skipped in the last
+    ``horizon`` steps of a day.
+    """
+
+    def __init__(self, price_tolerance=0.0, volume_tolerance=0.0, soc_tolerance=0.0):
+        self.price_tolerance = price_tolerance
+        self.volume_tolerance = volume_tolerance
+        self.soc_tolerance = soc_tolerance
+
+        self.last_solve = None
+
+    def record(self, step, end, window, results):
+        """Remember the window and results of a solved step."""
+        self.last_solve = {'step': step, 'end': end, 'window': window, 'results': results}
+
+    def can_reuse(self, step, end, window, soc):
+        """Check whether the last plan can be reused for this step."""
+        last_solve = self.last_solve
+        if last_solve is None or end != last_solve['end']:
+            return False
+
+        shift = step - last_solve['step']
+        if abs(soc - last_solve['results']['soc'][shift]) > self.soc_tolerance + SOC_EPSILON:
+            return False
+
+        # Top-of-book move of the first tradable delivery row between the snapshots
+        for column in ('bid_prices[1]', 'ask_prices[1]'):
+            if abs(window[column].iloc[1] - last_solve['window'][column].iloc[shift + 1]) > self.price_tolerance:
+                return False
+
+        # Changes in the remaining horizon (the front row is in delivery)
+        previous = last_solve['window'].iloc[shift + 1:]
+        current = window.iloc[1:]
+        prices = [c for c in window.columns if c.startswith(('bid_prices[', 'ask_prices['))]
+        volumes = [c for c in window.columns if c.startswith(('bid_volumes[', 'ask_volumes['))]
+
+        price_change = np.abs(current[prices].values - previous[prices].values).max()
+        volume_change = (np.abs(current[volumes].values - previous[volumes].values) /
+                         np.maximum(previous[volumes].values, 1.0)).max()
+
+        return price_change <= self.price_tolerance and volume_change <= self.volume_tolerance
+
+
+class BacktestEngine:
+    """
+    Rolling intrinsic backtest over an orderbook history.
+
+    The history has the same layout as ``input/timeseries_import.csv``, one
+    row per delivery time. With an additional ``snapshot_time`` column it
+    holds a sequence of orderbook snapshots, each listing the book of the
+    delivery rows traded at that time. Step ``k`` then trades against the
+    latest snapshot published at or before delivery row ``k``; delivery
+    rows missing from a snapshot have no volume. Without ``snapshot_time``
+    the history is a single static book that every step sees again.
+
+    At step ``k`` the optimization sees the delivery rows ``k`` onwards (up
+    to ``horizon`` rows ahead), the current state of charge and the position
+    committed so far. Row ``k`` itself is already in delivery and can no
+    longer be traded. All new trades of the step are added to the committed
+    position, and the state of charge at row ``k + 1`` is carried to the
+    next step, following the rolling intrinsic policy. The orders filled so
+    far are tracked per level and taken off the orderbook volumes, so later
+    steps cannot trade the same orders again.
+
+    Each step's decisions and solver statistics are appended to a
+    :class:`ColumnStore` in ``output_folder``. The ``profit`` column is the
+    cash flow of the step's new trades ($, revenue minus transaction costs),
+    ``traded_volume`` is in MWh and ``objective`` is the raw objective value
+    of the solve. ``highs_options`` are passed to HiGHS for every solve; by
+    default its log output is switched off. Every ``checkpoint_interval``
+    steps the state (step index, SoC, committed position, filled volumes) is written to
+    ``checkpoint.json``, from which an interrupted run resumes. If a solve
+    fails, its row is stored with ``success`` 0 and no decisions, nothing is
+    committed, the state before the step is checkpointed and the run stops
+    with a RuntimeError.
+
+    With a :class:`ChangeDetector`, steps whose orderbook and state of
+    charge have not materially changed since the last solve reuse the last
+    plan instead of solving again. After a resume the first step is always
+    solved.
+    """
+
+    def __init__(self, history, initial_soc, output_folder, horizon=None,
+                 checkpoint_interval=10, change_detector=None, highs_options=None,
+                 base_folder=None):
+        if 'snapshot_time' in history.columns:
+            history = history.sort_values(['snapshot_time', 'time'])
+            # Delivery rows, with the committed position of their first snapshot
+            self.history = (history.drop_duplicates('time').sort_values('time')
+                            .drop(columns='snapshot_time').reset_index(drop=True))
+            self.snapshot_times = []
+            self.snapshots = []
+            for snapshot_time, book in history.groupby('snapshot_time', sort=True):
+                self.snapshot_times.append(pd.Timestamp(snapshot_time))
+                self.snapshots.append(self._align(book.drop(columns='snapshot_time')))
+        else:
+            self.history = history.reset_index(drop=True)
+            self.snapshots = None
+        self.initial_soc = float(initial_soc)
+        self.output_folder = output_folder
+        self.horizon = horizon
+        self.checkpoint_interval = checkpoint_interval
+        self.change_detector = change_detector
+        # Keep the HiGHS log of the many per-step solves off the console by default
+        self.highs_options = {'output_flag': False} if highs_options is None else highs_options
+
+        if base_folder is None:
+            base_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+        self.model_folder = os.path.join(base_folder, 'model')
+
+        self.n_entries = sum(1 for c in self.history.columns if c.startswith('bid_prices['))
+        # Time step in hours, to turn traded power (MW) into energy (MWh)
+        self.dt = pd.to_datetime(self.history['time']).diff().dt.total_seconds().median() / 3600.0
+        self.checkpoint_file = os.path.join(output_folder, 'checkpoint.json')
+
+        columns = ['step', 'soc', 'committed_net_power', 'new_net_power',
+                   'charge_power', 'discharge_power']
+        columns += [f'discharge_power_bids[{i+1}]' for i in range(self.n_entries)]
+        columns += [f'charge_power_asks[{i+1}]' for i in range(self.n_entries)]
+        columns += ['profit', 'objective', 'traded_volume', 'success', 'solve_time', 'reused']
+        self.store = ColumnStore(os.path.join(output_folder, 'results'), columns)
+
+    def _align(self, book):
+        """Align a snapshot book to the delivery rows of the history."""
+        book = book.set_index('time').reindex(self.history['time'])
+        for column in book.columns:
+            if 'volumes[' in column:
+                book[column] = book[column].fillna(0.0)
+            else:
+                book[column] = book[column].ffill().bfill()
+        return book.reset_index()[self.history.columns]
+
+    def _book(self, k):
+        """Orderbook seen at step ``k``."""
+        if self.snapshots is None:
+            return self.history
+        delivery_time = pd.Timestamp(self.history['time'].iloc[k])
+        index = max(bisect.bisect_right(self.snapshot_times, delivery_time) - 1, 0)
+        return self.snapshots[index]
+
+    def _save_checkpoint(self, state):
+        tmp_file = self.checkpoint_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_file, self.checkpoint_file)
+
+    def _initial_state(self, resume):
+        if resume and os.path.exists(self.checkpoint_file):
+            with open(self.checkpoint_file) as f:
+                state = json.load(f)
+            self.store.truncate(state['n_rows'])
+            print(f"Resuming backtest at step {state['step']} from {self.checkpoint_file}")
+            return state
+
+        self.store.truncate(0)
+        return {
+            'step': 0,
+            'soc': self.initial_soc,
+            'committed': self.history['committed_net_power'].astype(float).tolist(),
+            'filled_bids': np.zeros((self.n_entries, len(self.history))).tolist(),
+            'filled_asks': np.zeros((self.n_entries, len(self.history))).tolist(),
+            'n_rows': 0,
+        }
+
+    def _solve(self, input_folder, window, soc):
+        """Solve the intraday problem on a window of the orderbook history."""
+        window.to_csv(os.path.join(input_folder, 'timeseries_import.csv'), index=False)
+        pd.DataFrame({'soc': [soc]}).to_csv(
+            os.path.join(input_folder, 'initial_state.csv'), index=False)
+
+        problem = BESSIntradayBacktest(
+            model_name='BESSIntraday',
+            highs_options=self.highs_options,
+            model_folder=self.model_folder,
+            input_folder=input_folder,
+            output_folder=input_folder,
+        )
+        problem.optimize()
+        return problem
+
+    def step(self, input_folder, state):
+        """
+        Run rolling step ``state['step']`` and return the stored row and next state.
+
+        If the solve fails, the next state is None.
+        """
+        k = state['step']
+        end = len(self.history) if self.horizon is None else min(len(self.history), k + self.horizon + 1)
+        committed = np.array(state['committed'])
+        filled_bids = np.array(state['filled_bids'])
+        filled_asks = np.array(state['filled_asks'])
+
+        window = self._book(k).iloc[k:end].copy()
+        window['committed_net_power'] = committed[k:end]
+        # Orders filled in earlier steps are no longer in the book
+        for i in range(self.n_entries):
+            window[f'bid_volumes[{i+1}]'] = np.maximum(
+                window[f'bid_volumes[{i+1}]'].values - filled_bids[i, k:end], 0.0)
+            window[f'ask_volumes[{i+1}]'] = np.maximum(
+                window[f'ask_volumes[{i+1}]'].values - filled_asks[i, k:end], 0.0)
+        # The front row is in delivery: no liquidity left to trade it
+        for i in range(self.n_entries):
+            window.loc[window.index[0], f'bid_volumes[{i+1}]'] = 0.0
+            window.loc[window.index[0], f'ask_volumes[{i+1}]'] = 0.0
+
+        if self.change_detector is not None and self.change_detector.can_reuse(k, end, window, state['soc']):
+            return self._reuse_step(state)
+
+        start_time = time.perf_counter()
+        problem = self._solve(input_folder, window, state['soc'])
+        solve_time = time.perf_counter() - start_time
+
+        if not problem.solver_stats.get('success', False):
+            # Nothing of a failed solve is committed; only the failure is stored
+            row = {
+                'step': k,
+                'soc': state['soc'],
+                'committed_net_power': committed[k + 1],
+                'success': 0.0,
+                'solve_time': solve_time,
+                'reused': 0.0,
+            }
+            return row, None
+
+        results = problem.extract_results()
+        discharge_bids = np.array([results[f'discharge_power_bids[{i+1}]'] for i in range(self.n_entries)])
+        charge_asks = np.array([results[f'charge_power_asks[{i+1}]'] for i in range(self.n_entries)])
+        new_net_power = discharge_bids.sum(axis=0) - charge_asks.sum(axis=0)
+
+        # Cash flow of the new trades: revenue minus transaction costs
+        bid_prices = window[[f'bid_prices[{i+1}]' for i in range(self.n_entries)]].values.T
+        ask_prices = window[[f'ask_prices[{i+1}]' for i in range(self.n_entries)]].values.T
+        traded_volume = discharge_bids.sum() + charge_asks.sum()
+        revenue = (discharge_bids * bid_prices).sum() - (charge_asks * ask_prices).sum()
+        profit = (revenue - problem.transaction_cost * traded_volume) * self.dt
+
+        committed[k:end] += new_net_power
+        filled_bids[:, k:end] += discharge_bids
+        filled_asks[:, k:end] += charge_asks
+
+        if self.change_detector is not None:
+            # Record the snapshot as left behind by this step's fills
+            remaining = window.copy()
+            for i in range(self.n_entries):
+                remaining[f'bid_volumes[{i+1}]'] -= discharge_bids[i]
+                remaining[f'ask_volumes[{i+1}]'] -= charge_asks[i]
+            self.change_detector.record(k, end, remaining, results)
+
+        row = {
+            'step': k,
+            'soc': state['soc'],
+            'committed_net_power': committed[k + 1],
+            'new_net_power': new_net_power[1],
+            'charge_power': results['charge_power'][1],
+            'discharge_power': results['discharge_power'][1],
+            'profit': profit,
+            'objective': float(problem.objective_value),
+            'traded_volume': traded_volume * self.dt,
+            'success': float(problem.solver_stats.get('success', False)),
+            'solve_time': solve_time,
+            'reused': 0.0,
+        }
+        for i in range(self.n_entries):
+            row[f'discharge_power_bids[{i+1}]'] = discharge_bids[i, 1]
+            row[f'charge_power_asks[{i+1}]'] = charge_asks[i, 1]
+
+        next_state = {
+            'step': k + 1,
+            'soc': float(results['soc'][1]),
+            'committed': committed.tolist(),
+            'filled_bids': filled_bids.tolist(),
+            'filled_asks': filled_asks.tolist(),
+            'n_rows': state['n_rows'] + 1,
+        }
+        return row, next_state
+
+    def _reuse_step(self, state):
+        """Advance one step along the last solved plan without new trades."""
+        k = state['step']
+        last_solve = self.change_detector.last_solve
+        results = last_solve['results']
+        index = k - last_solve['step'] + 1
+
+        row = {
+            'step': k,
+            'soc': state['soc'],
+            'committed_net_power': state['committed'][k + 1],
+            'new_net_power': 0.0,
+            'charge_power': results['charge_power'][index],
+            'discharge_power': results['discharge_power'][index],
+            'profit': 0.0,
+            'objective': 0.0,
+            'traded_volume': 0.0,
+            'success': 1.0,
+            'solve_time': 0.0,
+            'reused': 1.0,
+        }
+        for i in range(self.n_entries):
+            row[f'discharge_power_bids[{i+1}]'] = 0.0
+            row[f'charge_power_asks[{i+1}]'] = 0.0
+
+        # Follow the planned SoC, keeping any tolerated deviation from it
+        deviation = state['soc'] - float(results['soc'][index - 1])
+        soc = float(results['soc'][index]) + deviation
+
+        next_state = {
+            'step': k + 1,
+            'soc': soc,
+            'committed': state['committed'],
+            'filled_bids': state['filled_bids'],
+            'filled_asks': state['filled_asks'],
+            'n_rows': state['n_rows'] + 1,
+        }
+        return row, next_state
+
+    def run(self, resume=True):
+        """Replay the history step by step and return the stored results."""
+        state = self._initial_state(resume)
+        n_steps = len(self.history) - 1
+
+        input_folder = tempfile.mkdtemp(prefix='bess_backtest_')
+        try:
+            while state['step'] < n_steps:
+                row, next_state = self.step(input_folder, state)
+                self.store.append(row)
+
+                if next_state is None:
+                    self._save_checkpoint(state)
+                    raise RuntimeError(
+                        f"Solve failed at step {state['step']}; the state before this step "
+                        f"is saved in {self.checkpoint_file}")
+                state = next_state
+
+                if state['step'] % self.checkpoint_interval == 0 or state['step'] == n_steps:
+                    self._save_checkpoint(state)
+        finally:
+            shutil.rmtree(input_folder, ignore_errors=True)
+
+        return self.store.read()
+
+
+def run_day(day, history, initial_soc, output_folder, horizon=None, checkpoint_interval=10,
+            resume=True, skip_tolerances=None, compare=False):
+    """
+    Backtest a single delivery day into ``output_folder/<day>``.
+
+    By default every step is solved. With ``skip_tolerances``, a dict of
+    :class:`ChangeDetector` tolerances (``{}`` for exact reuse only), steps
+    without material orderbook changes reuse the last plan, e.g.
+    ``skip_tolerances={'price_tolerance': 0.5, 'volume_tolerance': 0.1}``.
+    With ``compare``, the day is
+    also backtested with a solve at every step (into ``output_folder/<day>/full``)
+    to report the profit difference.
+    """
+    engine = BacktestEngine(
+        history,
+        initial_soc,
+        os.path.join(output_folder, day),
+        horizon=horizon,
+        checkpoint_interval=checkpoint_interval,
+        change_detector=None if skip_tolerances is None else ChangeDetector(**skip_tolerances),
+    )
+    results = engine.run(resume=resume)
+    profit = results['profit'].sum()
+    print(f"{day}: {len(results)} steps, {int(results['reused'].sum())} skipped "
+          f"({results['reused'].mean():.0%}), profit ${profit:.2f}")
+
+    if compare:
+        full_engine = BacktestEngine(
+            history,
+            initial_soc,
+            os.path.join(output_folder, day, 'full'),
+            horizon=horizon,
+            checkpoint_interval=checkpoint_interval,
+        )
+        full_profit = full_engine.run(resume=resume)['profit'].sum()
+        print(f"{day}: profit when always re-solving ${full_profit:.2f} "
+              f"(difference ${profit - full_profit:.2f})")
+
+    return day, results
+
+
+def run_backtest(history_file='input/timeseries_import.csv',
+                 initial_state_file='input/initial_state.csv',
+                 output_folder='output/backtest',
+                 workers=1, **options):
+    """
+    Backtest the rolling intrinsic policy over an orderbook history.
+
+    Days are independent: each starts from the initial state of charge and
+    gets its own result store and checkpoint. With ``workers > 1`` the days
+    are sharded across worker processes. Further ``options`` are passed on
+    to :func:`run_day`.
+    """
+    history = pd.read_csv(history_file)
+    initial_soc = float(pd.read_csv(initial_state_file)['soc'].iloc[0])
+    days = {day: rows for day, rows in history.groupby(history['time'].str[:10], sort=True)}
+
+    if workers > 1 and len(days) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(run_day, day, rows, initial_soc, output_folder, **options)
+                for day, rows in days.items()
+            ]
+            results = dict(future.result() for future in futures)
+    else:
+        results = dict(
+            run_day(day, rows, initial_soc, output_folder, **options)
+            for day, rows in days.items()
+        )
+
+    total_profit = sum(df['profit'].sum() for df in results.values())
+    skip_rate = np.mean(np.concatenate([df['reused'].values for df in results.values()]))
+    print(f"Backtest completed: {len(results)} day(s), {skip_rate:.0%} of steps skipped, "
+          f"total profit ${total_profit:.2f}")
+    print(f"Results stored in {output_folder}")
+    return results
+
+
+if __name__ == "__main__":
+    run_backtest()
@@ -1,142 +1,175 @@
-import numpy as np
-from rtctools.optimization.collocated_integrated_optimization_problem import (
-    CollocatedIntegratedOptimizationProblem,
-)
-from rtctools.optimization.csv_mixin import CSVMixin
-from rtctools.optimization.modelica_mixin import ModelicaMixin
-from rtctools.util import run_optimization_problem
-
-
-class BESSIntraday(
-    CSVMixin,
-    ModelicaMixin,
-    CollocatedIntegratedOptimizationProblem,
-):
+"""
+Command line interface for the continuous intraday demo.
+
+Only the standard library is imported at module load. RTC-Tools (and
+through it CasADi and the Modelica toolchain), numpy, pandas and matplotlib
+are imported when they are needed, so ``--help``, ``--check`` and
+``--profile-import`` return quickly.
+"""
+import argparse
+import csv
+import logging
+import os
+import subprocess
+import sys
+
+BASE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SRC_FOLDER = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_args(argv=None):
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="BESS continuous intraday trading optimization (rolling intrinsic policy).")
+    parser.add_argument('--input-dir', default=os.path.join(BASE_FOLDER, 'input'),
+                        help="folder with timeseries_import.csv and initial_state.csv")
+    parser.add_argument('--output-dir', default=os.path.join(BASE_FOLDER, 'output'),
+                        help="folder for timeseries_export.csv and plots")
+    parser.add_argument('--model-dir', default=os.path.join(BASE_FOLDER, 'model'),
+                        help="folder with the Modelica model")
+    parser.add_argument('--horizon', type=float, default=None,
+                        help="optimization horizon in hours (default: all input data)")
+    parser.add_argument('--time-limit', type=float, default=None,
+                        help="HiGHS time limit in seconds")
+    parser.add_argument('--mip-gap', type=float, default=None,
+                        help="HiGHS relative MIP gap")
+    parser.add_argument('--volume-constraints', action='store_true',
+                        help="express the orderbook volume limits as path constraints instead of bounds")
+    parser.add_argument('--plot', action=argparse.BooleanOptionalAction, default=False,
+                        help="generate plots and summary statistics after solving")
+    parser.add_argument('--check', action='store_true',
+                        help="only check the input files and exit")
+    parser.add_argument('--profile-import', action='store_true',
+                        help="report import time per module and exit")
+    return parser.parse_args(argv)
+
+
+def check_inputs(input_dir):
+    """Check that the input files exist and contain the expected columns."""
+    errors = []
+
+    timeseries_file = os.path.join(input_dir, 'timeseries_import.csv')
+    if not os.path.exists(timeseries_file):
+        errors.append(f"{timeseries_file} not found")
+    else:
+        with open(timeseries_file, newline='') as f:
+            header = next(csv.reader(f), [])
+        n_entries = sum(1 for c in header if c.startswith('bid_prices['))
+        required = ['time', 'committed_net_power']
+        for prefix in ('bid_prices', 'ask_prices', 'bid_volumes', 'ask_volumes'):
+            required += [f'{prefix}[{i+1}]' for i in range(n_entries)]
+        if n_entries == 0:
+            errors.append(f"{timeseries_file} has no orderbook levels")
+        errors += [f"{timeseries_file} is missing column '{c}'" for c in required if c not in header]
+
+    initial_state_file = os.path.join(input_dir, 'initial_state.csv')
+    if not os.path.exists(initial_state_file):
+        errors.append(f"{initial_state_file} not found")
+
+    return errors
+
+
+def _import_times(code):
+    """Run ``code`` with ``-X importtime``; returns the process and (module, self, cumulative) rows."""
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=SRC_FOLDER, capture_output=True, text=True,
+    )
+    rows = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return process, rows
+
+
+def profile_imports(modules):
     """
-    BESS continuous intraday trading optimization with rolling intrinsic policy.
+    Report the import time per module of ``modules``.
 
-    This class implements a Battery Energy Storage System (BESS) optimization
-    for continuous intraday trading using a rolling intrinsic optimization approach.
-    The model interacts with an orderbook containing bids and asks at multiple
-    price levels.
-
-    The rolling intrinsic policy optimizes over a receding horizon, making
-    trading decisions based on the current orderbook state and future price
-    expectations.
+    The modules are imported in a fresh interpreter with ``-X importtime``,
+    so the report is not affected by anything already imported here.
+    Each module is listed with its own and cumulative import time, sorted by
+    its own time. Modules imported at interpreter startup are left out.
+    Returns False if an import failed.
     """
-
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        # Trading parameters
-        self.transaction_cost = 0.05  # $/MWh transaction cost
-        self.cycling_penalty_factor = 0.1  # $/MWh cycling penalty
-
-    def solver_options(self):
-        """Configure solver options for mixed-integer optimization."""
-        options = super().solver_options()
-        options['casadi_solver'] = 'qpsol'
-        options['solver'] = 'highs'
-        return options
-
-    def pre(self):
-        """Pre-processing to set up additional optimization variables."""
-        super().pre()
-
-        # Get number of orderbook entries from parameters
-        params = self.parameters(0)
-        self.n_entries = int(params['n_orderbook_entries'])
-
-    def path_objective(self, ensemble_member):
-        """
-        Define optimization objective: maximize trading profit.
-
-        For the rolling intrinsic policy, we optimize the expected value
-        based on current orderbook state, with power allocated across
-        different price levels.
-        """
-        # Revenue from selling to bids (discharging)
-        total_discharge = 0.0
-        discharge_revenue = 0.0
-        for i in range(self.n_entries):
-            bid_price = self.state(f'bid_prices[{i+1}]')
-            discharge_power_i = self.state(f'discharge_power_bids[{i+1}]')
-            total_discharge += discharge_power_i
-            discharge_revenue += bid_price * discharge_power_i
-
-        # Cost of buying from asks (charging)
-        total_charge = 0.0
-        charge_cost = 0.0
-        for i in range(self.n_entries):
-            ask_price = self.state(f'ask_prices[{i+1}]')
-            charge_power_i = self.state(f'charge_power_asks[{i+1}]')
-            total_charge += charge_power_i
-            charge_cost += ask_price * charge_power_i
-
-        # Transaction costs on total traded volume
-        transaction_cost = self.transaction_cost * (total_charge + total_discharge)
-
-        # Cycling penalty based on total power throughput
-        cycling_penalty = self.cycling_penalty_factor * (total_charge + total_discharge)
-
-        # Total objective (negative because we want to maximize profit)
-        profit = discharge_revenue - charge_cost - transaction_cost - cycling_penalty
-        return -profit
-
-    def path_constraints(self, ensemble_member):
-        """Define path constraints (inequality constraints over time)."""
-        constraints = super().path_constraints(ensemble_member)
-
-        parameters = self.parameters(ensemble_member)
-
-        # Ensure only one mode can be active at a time (complementarity)
-        constraints.append((
-            self.state('is_charging') +
-            self.state('is_discharging'),
-            -np.inf,
-            1.0,
-        ))
-        constraints.append((
-            self.state('charge_power') -
-            self.state('is_charging') * parameters["max_power"],
-            -np.inf,
-            0,
-        ))
-        constraints.append((
-            self.state('discharge_power') -
-            self.state('is_discharging') * parameters["max_power"],
-            -np.inf,
-            0,
-        ))
-
-        # Power allocated to each level cannot exceed available volume
-        for i in range(self.n_entries):
-            # Discharge limited by bid volume: discharge_power_bids[i] <= bid_volumes[i]
-            # Reformulated as: discharge_power_bids[i] - bid_volumes[i] <= 0
-            constraints.append((
-                self.state(f'discharge_power_bids[{i+1}]') - self.state(f'bid_volumes[{i+1}]'),
-                -np.inf,
-                0.0,
-            ))
-
-            # Charge limited by ask volume: charge_power_asks[i] <= ask_volumes[i]
-            # Reformulated as: charge_power_asks[i] - ask_volumes[i] <= 0
-            constraints.append((
-                self.state(f'charge_power_asks[{i+1}]') - self.state(f'ask_volumes[{i+1}]'),
-                -np.inf,
-                0.0,
-            ))
-
-        return constraints
-
-    def post(self):
-        """Post-processing step to save results and call plotting script."""
-        super().post()
-
-        print("Optimization completed successfully!")
-        print("Results saved to output/timeseries_export.csv")
-        print("Run 'uv run python src/plot_results.py' to generate plots and summary statistics.")
+    _, startup_rows = _import_times('pass')
+    startup = {name for name, _, _ in startup_rows}
+    process, rows = _import_times('; '.join(f'import {module}' for module in modules))
+
+    rows = [row for row in rows if row[0] not in startup]
+
+    print(f"{'module':<50} {'self [ms]':>10} {'cumulative [ms]':>16}")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda row: -row[1]):
+        print(f"{name:<50} {self_us / 1000:>10.1f} {cumulative_us / 1000:>16.1f}")
+    print(f"{'total':<50} {sum(row[1] for row in rows) / 1000:>10.1f}")
+
+    if process.returncode != 0:
+        print(f"Error: {process.stderr.strip().splitlines()[-1]}")
+        return False
+    return True
+
+
+def run(args):
+    """Solve the intraday problem; returns the optimization problem."""
+    from bess_intraday_problem import BESSIntraday
+
+    highs_options = {}
+    if args.time_limit is not None:
+        highs_options['time_limit'] = args.time_limit
+    if args.mip_gap is not None:
+        highs_options['mip_rel_gap'] = args.mip_gap
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    problem = BESSIntraday(
+        volume_bounds=not args.volume_constraints,
+        horizon=args.horizon,
+        highs_options=highs_options,
+        model_folder=args.model_dir,
+        input_folder=args.input_dir,
+        output_folder=args.output_dir,
+    )
+    problem.optimize()
+    return problem
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.profile_import:
+        modules = ['bess_intraday_problem'] + (['plot_results'] if args.plot else [])
+        return 0 if profile_imports(modules) else 1
+
+    errors = check_inputs(args.input_dir)
+    for error in errors:
+        print(f"Error: {error}")
+    if errors:
+        return 1
+    if args.check:
+        print(f"Input files in {args.input_dir} are valid.")
+        return 0
+
+    logging.basicConfig(format='%(asctime)s %(levelname)s %(message)s')
+    logging.getLogger('rtctools').setLevel(logging.INFO)
+
+    run(args)
+
+    if args.plot:
+        import plot_results
+
+        plot_results.create_plots(
+            csv_file=os.path.join(args.output_dir, 'timeseries_export.csv'),
+            price_file=os.path.join(args.input_dir, 'timeseries_import.csv'),
+            output_file=os.path.join(args.output_dir, 'bess_intraday_results.png'),
+        )
+        plot_results.print_summary(
+            csv_file=os.path.join(args.output_dir, 'timeseries_export.csv'),
+            price_file=os.path.join(args.input_dir, 'timeseries_import.csv'),
+        )
+
+    return 0
 
 
 if __name__ == "__main__":
-    # Run the optimization
-    run_optimization_problem(BESSIntraday)
+    sys.exit(main())
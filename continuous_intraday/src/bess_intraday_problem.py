@@ -0,0 +1,185 @@
+import os
+
+import numpy as np
+from rtctools.optimization.collocated_integrated_optimization_problem import (
+    CollocatedIntegratedOptimizationProblem,
+)
+from rtctools.optimization.csv_mixin import CSVMixin
+from rtctools.optimization.modelica_mixin import ModelicaMixin
+
+
+class BESSIntraday(
+    CSVMixin,
+    ModelicaMixin,
+    CollocatedIntegratedOptimizationProblem,
+):
+    """
+    BESS continuous intraday trading optimization with rolling intrinsic policy.
+
+    This class implements a Battery Energy Storage System (BESS) optimization
+    for continuous intraday trading using a rolling intrinsic optimization approach.
+    The model interacts with an orderbook containing bids and asks at multiple
+    price levels.
+
+    The rolling intrinsic policy optimizes over a receding horizon, making
+    trading decisions based on the current orderbook state and future price
+    expectations.
+    """
+
+    def __init__(self, volume_bounds=True, horizon=None, highs_options=None, **kwargs):
+        # Run options: optimization horizon (hours) and extra HiGHS options
+        self.horizon = horizon
+        self.highs_options = highs_options
+
+        super().__init__(**kwargs)
+        # Trading parameters
+        self.transaction_cost = 0.05  # $/MWh transaction cost
+        self.cycling_penalty_factor = 0.1  # $/MWh cycling penalty
+
+        # Orderbook volume limits as variable bounds (see bounds())
+        self.volume_bounds = volume_bounds
+
+    def solver_options(self):
+        """Configure solver options for mixed-integer optimization."""
+        options = super().solver_options()
+        options['casadi_solver'] = 'qpsol'
+        options['solver'] = 'highs'
+        if self.highs_options:
+            options['highs'] = dict(self.highs_options)
+        return options
+
+    def times(self, variable=None):
+        """Optimization times, truncated to the horizon (hours) if one is set."""
+        times = super().times(variable)
+        if self.horizon is not None:
+            times = times[times - times[0] <= self.horizon * 3600.0]
+        return times
+
+    def pre(self):
+        """Pre-processing to set up additional optimization variables."""
+        super().pre()
+
+        # Get number of orderbook entries from parameters
+        params = self.parameters(0)
+        self.n_entries = int(params['n_orderbook_entries'])
+
+    def path_objective(self, ensemble_member):
+        """
+        Define optimization objective: maximize trading profit.
+
+        For the rolling intrinsic policy, we optimize the expected value
+        based on current orderbook state, with power allocated across
+        different price levels.
+        """
+        # Revenue from selling to bids (discharging)
+        total_discharge = 0.0
+        discharge_revenue = 0.0
+        for i in range(self.n_entries):
+            bid_price = self.state(f'bid_prices[{i+1}]')
+            discharge_power_i = self.state(f'discharge_power_bids[{i+1}]')
+            total_discharge += discharge_power_i
+            discharge_revenue += bid_price * discharge_power_i
+
+        # Cost of buying from asks (charging)
+        total_charge = 0.0
+        charge_cost = 0.0
+        for i in range(self.n_entries):
+            ask_price = self.state(f'ask_prices[{i+1}]')
+            charge_power_i = self.state(f'charge_power_asks[{i+1}]')
+            total_charge += charge_power_i
+            charge_cost += ask_price * charge_power_i
+
+        # Transaction costs on total traded volume
+        transaction_cost = self.transaction_cost * (total_charge + total_discharge)
+
+        # Cycling penalty based on total power throughput
+        cycling_penalty = self.cycling_penalty_factor * (total_charge + total_discharge)
+
+        # Total objective (negative because we want to maximize profit)
+        profit = discharge_revenue - charge_cost - transaction_cost - cycling_penalty
+        return -profit
+
+    def path_constraints(self, ensemble_member):
+        """Define path constraints (inequality constraints over time)."""
+        constraints = super().path_constraints(ensemble_member)
+
+        parameters = self.parameters(ensemble_member)
+
+        # Ensure only one mode can be active at a time (complementarity)
+        constraints.append((
+            self.state('is_charging') +
+            self.state('is_discharging'),
+            -np.inf,
+            1.0,
+        ))
+        constraints.append((
+            self.state('charge_power') -
+            self.state('is_charging') * parameters["max_power"],
+            -np.inf,
+            0,
+        ))
+        constraints.append((
+            self.state('discharge_power') -
+            self.state('is_discharging') * parameters["max_power"],
+            -np.inf,
+            0,
+        ))
+
+        # Power allocated to each level cannot exceed available volume.
+        # With volume bounds these limits are set in bounds() instead.
+        if self.volume_bounds:
+            return constraints
+
+        for i in range(self.n_entries):
+            # Discharge limited by bid volume: discharge_power_bids[i] <= bid_volumes[i]
+            # Reformulated as: discharge_power_bids[i] - bid_volumes[i] <= 0
+            constraints.append((
+                self.state(f'discharge_power_bids[{i+1}]') - self.state(f'bid_volumes[{i+1}]'),
+                -np.inf,
+                0.0,
+            ))
+
+            # Charge limited by ask volume: charge_power_asks[i] <= ask_volumes[i]
+            # Reformulated as: charge_power_asks[i] - ask_volumes[i] <= 0
+            constraints.append((
+                self.state(f'charge_power_asks[{i+1}]') - self.state(f'ask_volumes[{i+1}]'),
+                -np.inf,
+                0.0,
+            ))
+
+        return constraints
+
+    def bounds(self, ensemble_member=None):
+        """
+        Bound the power allocated to each orderbook level by the available volume.
+
+        The limits discharge_power_bids[i](t) <= bid_volumes[i](t) and
+        charge_power_asks[i](t) <= ask_volumes[i](t) each bound a single
+        decision variable, so they are returned as time-varying upper bounds
+        rather than as path constraints. This keeps them out of the constraint
+        matrix altogether.
+        """
+        bounds = (
+            super().bounds(ensemble_member) if self.ensemble_specific_bounds else super().bounds()
+        )
+
+        if not self.volume_bounds:
+            return bounds
+
+        ensemble_member = ensemble_member if self.ensemble_specific_bounds else 0
+        for variable, volume in (('discharge_power_bids', 'bid_volumes'),
+                                 ('charge_power_asks', 'ask_volumes')):
+            for i in range(self.n_entries):
+                name = f'{variable}[{i+1}]'
+                lower, _ = bounds.get(name, (-np.inf, np.inf))
+                bounds[name] = (lower, self.get_timeseries(f'{volume}[{i+1}]', ensemble_member))
+
+        return bounds
+
+    def post(self):
+        """Post-processing step to save results and call plotting script."""
+        super().post()
+
+        print("Optimization completed successfully!")
+        print(f"Results saved to {os.path.join(self._output_folder, 'timeseries_export.csv')}")
+        print("Run 'uv run python src/plot_results.py' to generate plots and summary statistics.")
@@ -49,6 +49,8 @@ def create_plots(csv_file='output/timeseries_export.csv',
         return
 
     df_orderbook = pd.read_csv(price_file)
+    # Results may cover a shorter horizon than the input data
+    df_orderbook = df_orderbook.iloc[:len(df_results)]
 
     # Convert time column to datetime if it's not already
     if 'time' in df_results.columns:
@@ -226,6 +228,8 @@ def print_summary(csv_file='output/timeseries_export.csv',
 
     df_results = pd.read_csv(csv_file)
     df_orderbook = pd.read_csv(price_file)
+    # Results may cover a shorter horizon than the input data
+    df_orderbook = df_orderbook.iloc[:len(df_results)]
 
     # Extract variables
     soc = df_results['soc']
@@ -248,10 +252,10 @@ def print_summary(csv_file='output/timeseries_export.csv',
     total_revenue = np.sum(revenue) * dt
 
     # Calculate transaction costs and cycling penalty
-    transaction_cost_rate = 0.05  # Same as in bess_intraday.py
+    transaction_cost_rate = 0.05  # Same as in bess_intraday_problem.py
     total_transaction_cost = np.sum((charge_power + discharge_power) * transaction_cost_rate) * dt
 
-    cycling_penalty_factor = 0.1  # Same as in bess_intraday.py
+    cycling_penalty_factor = 0.1  # Same as in bess_intraday_problem.py
     total_cycling_penalty = np.sum((charge_power + discharge_power) * cycling_penalty_factor) * dt
 
     # Count number of trades
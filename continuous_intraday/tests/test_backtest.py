@@ -0,0 +1,134 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+BASE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(BASE_FOLDER, 'src'))
+
+from backtest import BacktestEngine, ChangeDetector, run_day  # noqa: E402
+
+
+def load_history(n_rows=4):
+    return pd.read_csv(os.path.join(BASE_FOLDER, 'input', 'timeseries_import.csv')).iloc[:n_rows]
+
+
+def test_backtest_runs_and_resumes(tmp_path):
+    history = load_history()
+
+    results = BacktestEngine(history, 50.0, str(tmp_path)).run(resume=False)
+    assert list(results['step']) == [0, 1, 2]
+    assert (results['success'] == 1.0).all()
+
+    # A completed run resumes from its final checkpoint without solving again
+    resumed = BacktestEngine(history, 50.0, str(tmp_path)).run(resume=True)
+    pd.testing.assert_frame_equal(results, resumed)
+
+
+def test_backtest_fills_each_order_once(tmp_path):
+    history = load_history(16)
+
+    BacktestEngine(history, 50.0, str(tmp_path)).run(resume=False)
+
+    with open(tmp_path / 'checkpoint.json') as f:
+        state = json.load(f)
+    n_entries = len(state['filled_bids'])
+    bid_volumes = history[[f'bid_volumes[{i+1}]' for i in range(n_entries)]].values.T
+    ask_volumes = history[[f'ask_volumes[{i+1}]' for i in range(n_entries)]].values.T
+    assert (np.array(state['filled_bids']) <= bid_volumes + 1e-6).all()
+    assert (np.array(state['filled_asks']) <= ask_volumes + 1e-6).all()
+
+
+def test_backtest_reuses_plan_for_unchanged_orderbook(tmp_path):
+    history = load_history(12)
+
+    full = BacktestEngine(history, 50.0, str(tmp_path / 'full')).run(resume=False)
+    detector = ChangeDetector(price_tolerance=0.0, volume_tolerance=0.0, soc_tolerance=0.0)
+    skipped = BacktestEngine(history, 50.0, str(tmp_path / 'skip'),
+                             change_detector=detector).run(resume=False)
+
+    # The history does not change between snapshots: only the first step is solved
+    assert list(skipped['reused']) == [0.0] + [1.0] * (len(history) - 2)
+    assert abs(skipped['profit'].sum() - full['profit'].sum()) < 1e-3
+
+
+def test_run_day_solves_every_step_by_default(tmp_path):
+    _, results = run_day('2024-01-01', load_history(4), 50.0, str(tmp_path))
+    assert (results['reused'] == 0.0).all()
+
+    _, results = run_day('2024-01-01', load_history(4), 50.0, str(tmp_path),
+                         resume=False, skip_tolerances={})
+    assert results['reused'].sum() > 0
+
+
+def test_backtest_stops_without_committing_a_failed_solve(tmp_path):
+    history = load_history(4)
+    # A committed position beyond the maximum power makes the problem infeasible
+    history.loc[2, 'committed_net_power'] = 1000.0
+
+    engine = BacktestEngine(history, 50.0, str(tmp_path))
+    with pytest.raises(RuntimeError):
+        engine.run(resume=False)
+
+    results = engine.store.read()
+    assert list(results['success']) == [0.0]
+    assert results[['profit', 'new_net_power']].isna().all().all()
+
+    with open(tmp_path / 'checkpoint.json') as f:
+        state = json.load(f)
+    assert state['step'] == 0
+    assert state['committed'] == list(history['committed_net_power'])
+    assert not np.any(state['filled_bids'])
+
+
+def snapshot_history(n_rows=6, change_at=2):
+    """Two orderbook snapshots; the second one has much cheaper asks."""
+    history = load_history(n_rows)
+    first = history.assign(snapshot_time=history['time'].iloc[0])
+    second = history.iloc[change_at:].assign(snapshot_time=history['time'].iloc[change_at])
+    for column in second.columns:
+        if column.startswith('ask_prices['):
+            second[column] = 1.0
+    return pd.concat([first, second], ignore_index=True)
+
+
+def test_backtest_replays_orderbook_snapshots(tmp_path):
+    results = BacktestEngine(snapshot_history(), 50.0, str(tmp_path)).run(resume=False)
+
+    # Nothing changes in the book before the second snapshot, which then
+    # allows buying back earlier sales at a profit
+    assert list(results['step']) == [0, 1, 2, 3, 4]
+    assert abs(results['profit'].iloc[1]) < 1e-6
+    assert results['profit'].iloc[2] > 0.0
+
+
+def test_change_detector_resolves_when_the_orderbook_changes(tmp_path):
+    history = snapshot_history()
+
+    detector = ChangeDetector()
+    results = BacktestEngine(history, 50.0, str(tmp_path / 'exact'),
+                             change_detector=detector).run(resume=False)
+    assert list(results['reused']) == [0.0, 1.0, 0.0, 1.0, 1.0]
+
+    # Tolerating the price change skips the new snapshot as well
+    detector = ChangeDetector(price_tolerance=100.0)
+    results = BacktestEngine(history, 50.0, str(tmp_path / 'tolerant'),
+                             change_detector=detector).run(resume=False)
+    assert list(results['reused']) == [0.0, 1.0, 1.0, 1.0, 1.0]
+
+
+def test_change_detector_reuse_with_horizon_is_exact(tmp_path):
+    history = load_history(20)
+    horizon = 6
+
+    results = BacktestEngine(history, 50.0, str(tmp_path), horizon=horizon,
+                             change_detector=ChangeDetector()).run(resume=False)
+
+    # The horizon end moves every step until it reaches the end of the history;
+    # from then on the plan is reused without re-solving
+    n_steps = len(history) - 1
+    n_solved = len(history) - horizon
+    assert list(results['reused']) == [0.0] * n_solved + [1.0] * (n_steps - n_solved)
@@ -0,0 +1,43 @@
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+BASE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(BASE_FOLDER, 'src'))
+
+from bess_intraday_problem import BESSIntraday  # noqa: E402
+
+
+def solve(tmp_path, volume_bounds, n_rows=8):
+    input_folder = tmp_path / 'input'
+    if not input_folder.exists():
+        input_folder.mkdir()
+        history = pd.read_csv(os.path.join(BASE_FOLDER, 'input', 'timeseries_import.csv'))
+        history.iloc[:n_rows].to_csv(input_folder / 'timeseries_import.csv', index=False)
+        shutil.copy(os.path.join(BASE_FOLDER, 'input', 'initial_state.csv'), input_folder)
+
+    problem = BESSIntraday(
+        volume_bounds=volume_bounds,
+        highs_options={'output_flag': False},
+        model_folder=os.path.join(BASE_FOLDER, 'model'),
+        input_folder=str(input_folder),
+        output_folder=str(tmp_path),
+    )
+    assert problem.optimize()
+    return problem
+
+
+def test_volume_bounds_match_volume_constraints(tmp_path):
+    bounded = solve(tmp_path, volume_bounds=True)
+    constrained = solve(tmp_path, volume_bounds=False)
+
+    assert np.isclose(bounded.objective_value, constrained.objective_value)
+
+    bounded_results = bounded.extract_results()
+    constrained_results = constrained.extract_results()
+    for i in range(bounded.n_entries):
+        for variable in (f'discharge_power_bids[{i+1}]', f'charge_power_asks[{i+1}]'):
+            np.testing.assert_allclose(bounded_results[variable], constrained_results[variable], atol=1e-6)
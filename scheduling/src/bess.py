@@ -1,95 +1,166 @@
-import numpy as np
-from rtctools.optimization.collocated_integrated_optimization_problem import (
-    CollocatedIntegratedOptimizationProblem,
-)
-from rtctools.optimization.csv_mixin import CSVMixin
-from rtctools.optimization.modelica_mixin import ModelicaMixin
-from rtctools.util import run_optimization_problem
-
-
-class BESS(
-    CSVMixin,
-    ModelicaMixin,
-    CollocatedIntegratedOptimizationProblem,
-):
+"""
+Command line interface for the scheduling demo.
+
+Only the standard library is imported at module load. RTC-Tools (and
+through it CasADi and the Modelica toolchain), numpy, pandas and matplotlib
+are imported when they are needed, so ``--help``, ``--check`` and
+``--profile-import`` return quickly.
+"""
+import argparse
+import csv
+import logging
+import os
+import subprocess
+import sys
+
+BASE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SRC_FOLDER = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_args(argv=None):
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="BESS day-ahead scheduling optimization (time arbitrage).")
+    parser.add_argument('--input-dir', default=os.path.join(BASE_FOLDER, 'input'),
+                        help="folder with timeseries_import.csv and initial_state.csv")
+    parser.add_argument('--output-dir', default=os.path.join(BASE_FOLDER, 'output'),
+                        help="folder for timeseries_export.csv and plots")
+    parser.add_argument('--model-dir', default=os.path.join(BASE_FOLDER, 'model'),
+                        help="folder with the Modelica model")
+    parser.add_argument('--horizon', type=float, default=None,
+                        help="optimization horizon in hours (default: all input data)")
+    parser.add_argument('--time-limit', type=float, default=None,
+                        help="HiGHS time limit in seconds")
+    parser.add_argument('--mip-gap', type=float, default=None,
+                        help="HiGHS relative MIP gap")
+    parser.add_argument('--plot', action=argparse.BooleanOptionalAction, default=False,
+                        help="generate plots and summary statistics after solving")
+    parser.add_argument('--check', action='store_true',
+                        help="only check the input files and exit")
+    parser.add_argument('--profile-import', action='store_true',
+                        help="report import time per module and exit")
+    return parser.parse_args(argv)
+
+
+def check_inputs(input_dir):
+    """Check that the input files exist and contain the expected columns."""
+    errors = []
+
+    timeseries_file = os.path.join(input_dir, 'timeseries_import.csv')
+    if not os.path.exists(timeseries_file):
+        errors.append(f"{timeseries_file} not found")
+    else:
+        with open(timeseries_file, newline='') as f:
+            header = next(csv.reader(f), [])
+        errors += [f"{timeseries_file} is missing column '{c}'" for c in ('time', 'price') if c not in header]
+
+    initial_state_file = os.path.join(input_dir, 'initial_state.csv')
+    if not os.path.exists(initial_state_file):
+        errors.append(f"{initial_state_file} not found")
+
+    return errors
+
+
+def _import_times(code):
+    """Run ``code`` with ``-X importtime``; returns the process and (module, self, cumulative) rows."""
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=SRC_FOLDER, capture_output=True, text=True,
+    )
+    rows = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return process, rows
+
+
+def profile_imports(modules):
     """
-    BESS optimization problem for time arbitrage.
-    
-    This class implements a Battery Energy Storage System (BESS) optimization
-    problem that maximizes revenue from time arbitrage while considering
-    cycling penalties and round-trip efficiency.
-    
-    The physical asset (battery dynamics) is modeled in Modelica, while the
-    revenue and costs are calculated in Python.
+    Report the import time per module of ``modules``.
+
+    The modules are imported in a fresh interpreter with ``-X importtime``,
+    so the report is not affected by anything already imported here.
+    Each module is listed with its own and cumulative import time, sorted by
+    its own time. Modules imported at interpreter startup are left out.
+    Returns False if an import failed.
     """
+    _, startup_rows = _import_times('pass')
+    startup = {name for name, _, _ in startup_rows}
+    process, rows = _import_times('; '.join(f'import {module}' for module in modules))
+
+    rows = [row for row in rows if row[0] not in startup]
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        # Economic parameters (not in Modelica model)
-        self.cycling_penalty_factor = 0.1  # $/MWh cycling penalty
-
-    def solver_options(self):
-        """Configure solver options for mixed-integer optimization."""
-        options = super().solver_options()
-        options['casadi_solver'] = 'qpsol'
-        options['solver'] = 'highs'
-        return options
-
-    def path_objective(self, ensemble_member):
-        """
-        Define optimization objective: maximize revenue minus cycling penalty.
-        
-        This separates the economic value streams (calculated in Python) from
-        the physical asset model (defined in Modelica).
-        """
-        # Revenue from energy arbitrage
-        revenue = self.state('net_power') * self.state('price')
-        
-        # Cycling penalty based on total power throughput
-        cycling_penalty = self.cycling_penalty_factor * (
-            self.state('charge_power') + self.state('discharge_power')
+    print(f"{'module':<50} {'self [ms]':>10} {'cumulative [ms]':>16}")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda row: -row[1]):
+        print(f"{name:<50} {self_us / 1000:>10.1f} {cumulative_us / 1000:>16.1f}")
+    print(f"{'total':<50} {sum(row[1] for row in rows) / 1000:>10.1f}")
+
+    if process.returncode != 0:
+        print(f"Error: {process.stderr.strip().splitlines()[-1]}")
+        return False
+    return True
+
+
+def run(args):
+    """Solve the scheduling problem; returns the optimization problem."""
+    from bess_problem import BESS
+
+    highs_options = {}
+    if args.time_limit is not None:
+        highs_options['time_limit'] = args.time_limit
+    if args.mip_gap is not None:
+        highs_options['mip_rel_gap'] = args.mip_gap
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    problem = BESS(
+        horizon=args.horizon,
+        highs_options=highs_options,
+        model_folder=args.model_dir,
+        input_folder=args.input_dir,
+        output_folder=args.output_dir,
+    )
+    problem.optimize()
+    return problem
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.profile_import:
+        modules = ['bess_problem'] + (['plot_results'] if args.plot else [])
+        return 0 if profile_imports(modules) else 1
+
+    errors = check_inputs(args.input_dir)
+    for error in errors:
+        print(f"Error: {error}")
+    if errors:
+        return 1
+    if args.check:
+        print(f"Input files in {args.input_dir} are valid.")
+        return 0
+
+    logging.basicConfig(format='%(asctime)s %(levelname)s %(message)s')
+    logging.getLogger('rtctools').setLevel(logging.INFO)
+
+    run(args)
+
+    if args.plot:
+        import plot_results
+
+        plot_results.create_plots(
+            csv_file=os.path.join(args.output_dir, 'timeseries_export.csv'),
+            price_file=os.path.join(args.input_dir, 'timeseries_import.csv'),
+            output_file=os.path.join(args.output_dir, 'bess_optimisation_results.png'),
+        )
+        plot_results.print_summary(
+            csv_file=os.path.join(args.output_dir, 'timeseries_export.csv'),
+            price_file=os.path.join(args.input_dir, 'timeseries_import.csv'),
         )
-        
-        # Total objective (negative because we want to maximize)
-        return -(revenue - cycling_penalty)
-
-    def path_constraints(self, ensemble_member):
-        """Define path constraints (inequality constraints over time)."""
-        constraints = super().path_constraints(ensemble_member)
-
-        parameters = self.parameters(ensemble_member)
-        
-        # Ensure only one mode can be active at a time (complementarity)
-        constraints.append((
-            self.state('is_charging') + 
-            self.state('is_discharging'),
-            -np.inf,
-            1.0,
-        ))
-        constraints.append((
-            self.state('charge_power') -
-            self.state('is_charging') * parameters["max_power"],
-            -np.inf,
-            0,
-        ))
-        constraints.append((
-            self.state('discharge_power') -
-            self.state('is_discharging') * parameters["max_power"],
-            -np.inf,
-            0,
-        ))
-        
-        return constraints
-
-    def post(self):
-        """Post-processing step to save results and call plotting script."""
-        super().post()
-        
-        print("Optimization completed successfully!")
-        print("Results saved to output/timeseries_export.csv")
-        print("Run 'uv run python src/plot_results.py' to generate plots and summary statistics.")
+
+    return 0
 
 
 if __name__ == "__main__":
-    # Run the optimization
-    run_optimization_problem(BESS)
+    sys.exit(main())
@@ -49,6 +49,8 @@ def create_plots(csv_file='output/timeseries_export.csv',
         return
     
     df_prices = pd.read_csv(price_file)
+    # Results may cover a shorter horizon than the input data
+    df_prices = df_prices.iloc[:len(df_results)]
     
     # Convert time column to datetime if it's not already
     if 'time' in df_results.columns:
@@ -142,6 +144,8 @@ def print_summary(csv_file='output/timeseries_export.csv',
     
     df_results = pd.read_csv(csv_file)
     df_prices = pd.read_csv(price_file)
+    # Results may cover a shorter horizon than the input data
+    df_prices = df_prices.iloc[:len(df_results)]
     
     # Extract variables
     soc = df_results['soc']
@@ -161,7 +165,7 @@ def print_summary(csv_file='output/timeseries_export.csv',
     total_revenue = np.sum(revenue) * dt
     
     # Calculate cycling penalty
-    cycling_penalty_factor = 0.1  # Same as in bess.py
+    cycling_penalty_factor = 0.1  # Same as in bess_problem.py
     total_cycling_penalty = np.sum((charge_power + discharge_power) * cycling_penalty_factor) * dt
     
     print("\n" + "="*50)